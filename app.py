@@ -1,14 +1,21 @@
+import asyncio
+import jinja2
+import orjson
+from ulid import ULID
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, ORJSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from typing import List, Optional, Dict
-from src.main import generate_vacation_plan
+from typing import Any, List, Optional, Dict
+from src.main import generate_vacation_plan, stream_vacation_plan
+from src.providers.wikipedia import close_http_client
 import os
 from dotenv import load_dotenv
 from src.audit.logger import configure_logging
-from src.audit.store import create_tables, record_event, list_events
+from src.audit.store import create_tables, enqueue_event, list_events, start_audit_writer, stop_audit_writer
 from starlette.middleware.sessions import SessionMiddleware
+from starsessions import SessionAutoloadMiddleware, SessionMiddleware as ServerSessionMiddleware
+from starsessions.stores.redis import RedisStore
 from src.database import init_db
 from src.permissions.consent import UserConsent, ConsentScopes
 from src.permissions.oauth import get_oauth
@@ -16,39 +23,75 @@ from src.payment.vault import PaymentVault, StoredPaymentToken
 from src.payment.processor import PaymentProcessor, PaymentMethod
 from src.payment.gateway_mock import MockGatewayClient
 from src.booking.automation import process_reservations, send_confirmations
-from src.booking.policy import BookingPolicy, check_policy
+from src.booking.policy import BookingPolicy
+from src.state.store import CAPTURE_PENDING, get_state_store
+
+class AppJSONResponse(ORJSONResponse):
+    """
+    orjson-rendered response used app-wide. Naive datetimes (stored as UTC) are emitted as ISO-8601 with a 'Z' suffix.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z,
+        )
+
 
 app = FastAPI(
     title="WanderGenie API",
     description="An AI-powered vacation planner that generates personalized itineraries.",
     version="0.1.0",
+    default_response_class=AppJSONResponse,
 )
 # Enable server-side sessions required by OAuth client
-app.add_middleware(SessionMiddleware, secret_key=os.getenv("SESSION_SECRET", "change_me_dev_only"))
-
-templates = Jinja2Templates(directory="templates")
+_redis_url = os.getenv("REDIS_URL")
+# Secure-only session cookie unless explicitly disabled for local plain-HTTP development
+_session_https_only = os.getenv("SESSION_COOKIE_HTTPS_ONLY", "true").lower() not in ("0", "false", "no")
+if _redis_url:
+    # Session data lives in Redis and is shared across workers; the cookie only carries the session id.
+    # Only the OAuth routes use the session, so only they pay for loading it.
+    app.add_middleware(SessionAutoloadMiddleware, paths=["/oauth/"])
+    app.add_middleware(
+        ServerSessionMiddleware, store=RedisStore(_redis_url), lifetime=3600, cookie_https_only=_session_https_only
+    )
+else:
+    app.add_middleware(
+        SessionMiddleware, secret_key=os.getenv("SESSION_SECRET", "change_me_dev_only"), https_only=_session_https_only
+    )
+
+# Templates don't change at runtime: skip per-request mtime checks and compile once at startup
+templates = Jinja2Templates(
+    env=jinja2.Environment(loader=jinja2.FileSystemLoader("templates"), autoescape=True, auto_reload=False)
+)
 
 # Ensure environment variables are loaded in server process
 @app.on_event("startup")
-def _startup():
+async def _startup():
     env_path = os.path.join(os.path.dirname(__file__), ".env")
     load_dotenv(dotenv_path=env_path, override=True)
     configure_logging()
-    init_db()
+    await init_db()
     # Ensure audit tables exist
-    create_tables()
+    await create_tables()
+    start_audit_writer()
+    templates.get_template("index.html")
 
     # Initialize shared services
-    global payment_vault, payment_processor, oauth, CONSENTS, OAUTH_TOKENS, PAYMENT_TOKENS, HOLDS, IDEMPOTENCY, IDEMPOTENCY_CAPTURE
+    global payment_vault, payment_processor, oauth, STATE
     payment_vault = PaymentVault()
     payment_processor = PaymentProcessor(MockGatewayClient())
     oauth = get_oauth()
-    CONSENTS = {}
-    OAUTH_TOKENS = {}
-    PAYMENT_TOKENS = {}
-    HOLDS = {}
-    IDEMPOTENCY = {}
-    IDEMPOTENCY_CAPTURE = {}
+    # Consents, tokens, holds and idempotency keys live in Redis so all workers share them
+    STATE = get_state_store()
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    # Drain queued audit events before the process exits
+    await stop_audit_writer()
+    await STATE.close()
+    await close_http_client()
 
 class VacationPreferences(BaseModel):
     destination: str
@@ -66,14 +109,22 @@ async def create_vacation_plan(preferences: VacationPreferences):
     - **budget**: The estimated budget for the trip (e.g., "Budget-friendly", "Moderate", "Luxury").
     - **interests**: A list of interests to tailor the plan (e.g., ["History", "Food", "Adventure"]).
     """
-    plan = generate_vacation_plan(preferences.dict())
+    plan = await generate_vacation_plan(preferences.dict())
     return {"plan": plan}
 
 
+@app.post("/api/plan/stream", tags=["Vacation Planning"])
+async def stream_plan(preferences: VacationPreferences):
+    """
+    Same as /api/plan, but streams the HTML table as it is generated so the UI can render rows progressively.
+    """
+    return StreamingResponse(stream_vacation_plan(preferences.dict()), media_type="text/html; charset=utf-8")
+
+
 # ----- Permissions & OAuth2 -----
 @app.post("/api/consent", tags=["Permissions"])
 async def set_consent(consent: UserConsent):
-    CONSENTS[consent.user_id] = consent
+    await STATE.set_consent(consent)
     return {"status": "ok", "user_id": consent.user_id, "scopes": consent.scopes.dict()}
 
 
@@ -88,8 +139,8 @@ async def oauth_callback(request: Request):
     token = await oauth.google.authorize_access_token(request)
     # In production, associate with authenticated user
     user_id = "demo-user"
-    OAUTH_TOKENS[user_id] = token
-    return JSONResponse({"status": "ok", "user_id": user_id, "provider": "google"})
+    await STATE.set_oauth_token(user_id, token)
+    return AppJSONResponse({"status": "ok", "user_id": user_id, "provider": "google"})
 
 
 # ----- Payments -----
@@ -102,9 +153,9 @@ class StoreTokenRequest(BaseModel):
 
 @app.post("/api/payment/store-token", tags=["Payments"])
 async def store_payment_token(payload: StoreTokenRequest):
-    masked_pan = f"**** **** **** {payload.last4}"
+    masked_pan = PaymentVault.mask_pan(payload.last4)
     stored: StoredPaymentToken = payment_vault.store_token(payload.gateway_token, masked_pan, payload.brand)
-    PAYMENT_TOKENS[payload.user_id] = stored
+    await STATE.set_payment_token(payload.user_id, stored)
     return {"status": "ok", "user_id": payload.user_id, "masked_pan": stored.masked_pan, "brand": stored.brand}
 
 
@@ -116,9 +167,9 @@ class AuthorizePaymentRequest(BaseModel):
 
 @app.post("/api/payment/authorize", tags=["Payments"])
 async def authorize_payment(payload: AuthorizePaymentRequest):
-    stored = PAYMENT_TOKENS.get(payload.user_id)
+    stored = await STATE.get_payment_token(payload.user_id)
     if not stored:
-        return JSONResponse({"error": "no payment token"}, status_code=400)
+        return AppJSONResponse({"error": "no payment token"}, status_code=400)
     token = payment_vault.retrieve_token(stored)
     method = PaymentMethod(type="card", token=token, label=stored.masked_pan)
     res = await payment_processor.authorize(payload.amount_minor, payload.currency, method, details={"user_id": payload.user_id})
@@ -133,9 +184,9 @@ class BookingRequest(BaseModel):
 
 @app.post("/api/book", tags=["Booking"])
 async def book_itinerary(payload: BookingRequest):
-    consent: Optional[UserConsent] = CONSENTS.get(payload.user_id)
+    consent: Optional[UserConsent] = await STATE.get_consent(payload.user_id)
     if not consent:
-        return JSONResponse({"error": "no consent"}, status_code=400)
+        return AppJSONResponse({"error": "no consent"}, status_code=400)
     authorized = bool(consent.scopes.payment_processing)
     results = await process_reservations(payload.itinerary, authorized=authorized)
     await send_confirmations(results)
@@ -163,111 +214,126 @@ class CaptureRequest(BaseModel):
 
 @app.get("/api/audit/recent", tags=["Audit"])
 async def recent_audit(limit: int = 50, actor: Optional[str] = None, action: Optional[str] = None):
-    events = list_events(limit=limit)
-    if actor:
-        events = [e for e in events if e.actor == actor]
-    if action:
-        events = [e for e in events if e.action == action]
-    return [{
-        "id": e.id,
-        "created_at": e.created_at.isoformat() + "Z",
-        "actor": e.actor,
-        "action": e.action,
-        "status": e.status,
-        "reservation_id": e.reservation_id,
-        "amount_minor": e.amount_minor,
-        "currency": e.currency,
-        "vendor": e.vendor,
-        "reasons": e.reasons,
-    } for e in events]
+    events = await list_events(limit=limit, actor=actor, action=action)
+    # Return the response directly so orjson serializes datetimes natively (no jsonable_encoder pass)
+    return AppJSONResponse([e.model_dump(exclude={"details"}) for e in events])
+
+
+def _idempotent_hold(payload: HoldRequest, reservation_id: str) -> Dict[str, Any]:
+    enqueue_event(actor=payload.user_id, action="HELD", status="ok", reservation_id=reservation_id, amount_minor=payload.amount_minor, currency=payload.currency, vendor=payload.vendor, details={"reasons": ["idempotent-return"]})
+    return {"status": "HELD", "reservation_id": reservation_id, "idempotent": True}
 
 
 @app.post("/api/autonomous/hold", tags=["Autonomous"])
 async def autonomous_hold(payload: HoldRequest):
-    consent: Optional[UserConsent] = CONSENTS.get(payload.user_id)
+    # Consent and idempotency lookups are independent; fetch them concurrently
+    consent, existing = await asyncio.gather(
+        STATE.get_consent(payload.user_id),
+        STATE.get_hold_idempotency(payload.idempotency_key),
+    )
     if not consent:
-        record_event(actor=payload.user_id, action="PROPOSED", status="error", amount_minor=payload.amount_minor, currency=payload.currency, vendor=payload.vendor, details={"reasons": ["no consent"]})
-        return JSONResponse({"error": "no consent"}, status_code=400)
+        enqueue_event(actor=payload.user_id, action="PROPOSED", status="error", amount_minor=payload.amount_minor, currency=payload.currency, vendor=payload.vendor, details={"reasons": ["no consent"]})
+        return AppJSONResponse({"error": "no consent"}, status_code=400)
 
-    # Idempotency check
-    if payload.idempotency_key:
-        existing = IDEMPOTENCY.get(payload.idempotency_key)
-        if existing:
-            record_event(actor=payload.user_id, action="HELD", status="ok", reservation_id=existing, amount_minor=payload.amount_minor, currency=payload.currency, vendor=payload.vendor, details={"reasons": ["idempotent-return"]})
-            return {"status": "HELD", "reservation_id": existing, "idempotent": True}
+    # Idempotency check (fast path; the atomic claim below settles concurrent duplicates)
+    if existing:
+        return _idempotent_hold(payload, existing)
 
     # Policy checks
-    policy_res = check_policy(payload.amount_minor, payload.currency, payload.vendor, payload.policy)
-    if not policy_res["ok"]:
-        record_event(actor=payload.user_id, action="PROPOSED", status="denied", amount_minor=payload.amount_minor, currency=payload.currency, vendor=payload.vendor, details={"reasons": policy_res["reasons"]}) 
-        return JSONResponse({"status": "denied", "reasons": policy_res["reasons"]}, status_code=400)
+    denied = payload.policy.compile()(payload.amount_minor, payload.currency, payload.vendor)
+    if denied:
+        reasons = list(denied)
+        enqueue_event(actor=payload.user_id, action="PROPOSED", status="denied", amount_minor=payload.amount_minor, currency=payload.currency, vendor=payload.vendor, details={"reasons": reasons})
+        return AppJSONResponse({"status": "denied", "reasons": reasons}, status_code=400)
 
     # Create a simple hold record
-    reservation_id = f"res_{len(HOLDS) + 1:05d}"
-    HOLDS[reservation_id] = {
+    # Time-sortable and generated locally, so concurrent workers never contend on a counter
+    reservation_id = f"res_{ULID()}"
+    existing = await STATE.claim_hold_idempotency(payload.idempotency_key, reservation_id)
+    if existing:
+        return _idempotent_hold(payload, existing)
+    await STATE.set_hold(reservation_id, {
         "status": "HELD",
         "user_id": payload.user_id,
         "amount_minor": payload.amount_minor,
         "currency": payload.currency,
         "vendor": payload.vendor,
         "require_two_step": payload.policy.require_two_step_payment,
-    }
-    if payload.idempotency_key:
-        IDEMPOTENCY[payload.idempotency_key] = reservation_id
-    record_event(actor=payload.user_id, action="HELD", status="ok", reservation_id=reservation_id, amount_minor=payload.amount_minor, currency=payload.currency, vendor=payload.vendor)
+    })
+    enqueue_event(actor=payload.user_id, action="HELD", status="ok", reservation_id=reservation_id, amount_minor=payload.amount_minor, currency=payload.currency, vendor=payload.vendor)
     return {"status": "HELD", "reservation_id": reservation_id}
 
 
 @app.post("/api/autonomous/approve", tags=["Autonomous"])
 async def autonomous_approve(payload: ApproveRequest):
-    rec = HOLDS.get(payload.reservation_id)
+    rec = await STATE.get_hold(payload.reservation_id)
     if not rec:
-        return JSONResponse({"error": "no reservation"}, status_code=404)
+        return AppJSONResponse({"error": "no reservation"}, status_code=404)
     rec["status"] = "APPROVED"
-    record_event(actor=rec.get("user_id", "unknown"), action="APPROVED", status="ok", reservation_id=payload.reservation_id)
+    await STATE.set_hold(payload.reservation_id, rec)
+    enqueue_event(actor=rec.get("user_id", "unknown"), action="APPROVED", status="ok", reservation_id=payload.reservation_id)
     return {"status": "APPROVED", "reservation_id": payload.reservation_id}
 
 
 @app.post("/api/autonomous/capture", tags=["Autonomous"])
 async def autonomous_capture(payload: CaptureRequest):
-    consent: Optional[UserConsent] = CONSENTS.get(payload.user_id)
+    consent: Optional[UserConsent] = await STATE.get_consent(payload.user_id)
     if not consent:
-        record_event(actor=payload.user_id, action="CAPTURED", status="error", reservation_id=payload.reservation_id, details={"reasons": ["no consent"]})
-        return JSONResponse({"error": "no consent"}, status_code=400)
+        enqueue_event(actor=payload.user_id, action="CAPTURED", status="error", reservation_id=payload.reservation_id, details={"reasons": ["no consent"]})
+        return AppJSONResponse({"error": "no consent"}, status_code=400)
     if not bool(consent.scopes.payment_processing):
-        record_event(actor=payload.user_id, action="CAPTURED", status="error", reservation_id=payload.reservation_id, details={"reasons": ["payment_processing scope missing"]})
-        return JSONResponse({"error": "payment_processing scope missing"}, status_code=403)
-
-    # Idempotency check for capture
+        enqueue_event(actor=payload.user_id, action="CAPTURED", status="error", reservation_id=payload.reservation_id, details={"reasons": ["payment_processing scope missing"]})
+        return AppJSONResponse({"error": "payment_processing scope missing"}, status_code=403)
+
+    # Idempotency check for capture: claim the key atomically so concurrent retries can't both charge
+    existing = await STATE.claim_capture_idempotency(payload.idempotency_key)
+    if existing:
+        if existing.get("status") == CAPTURE_PENDING:
+            return AppJSONResponse({"error": "capture already in progress"}, status_code=409)
+        return {"status": "CONFIRMED", "reservation_id": payload.reservation_id, "payment": existing, "idempotent": True}
+
+    try:
+        authorized = await _authorize_capture(payload)
+    except Exception:
+        await STATE.release_capture_idempotency(payload.idempotency_key)
+        raise
+    if isinstance(authorized, AppJSONResponse):
+        # Nothing was charged yet, so release the key and let the client retry it
+        await STATE.release_capture_idempotency(payload.idempotency_key)
+        return authorized
+    rec, auth_res = authorized
+
+    # From here the gateway may have charged: the claim is never released. If capture itself raises,
+    # the pending marker stays until it expires; once it returns, its result is stored under the key first.
+    cap_res = await payment_processor.capture(auth_res["authorization_id"])
     if payload.idempotency_key:
-        existing = IDEMPOTENCY_CAPTURE.get(payload.idempotency_key)
-        if existing:
-            return {"status": "CONFIRMED", "reservation_id": payload.reservation_id, "payment": existing, "idempotent": True}
+        await STATE.set_capture_idempotency(payload.idempotency_key, cap_res)
+    rec["status"] = "CONFIRMED"
+    rec["payment_id"] = cap_res.get("payment_id")
+    await STATE.set_hold(payload.reservation_id, rec)
+    enqueue_event(actor=payload.user_id, action="CAPTURED", status="ok", reservation_id=payload.reservation_id, amount_minor=rec["amount_minor"], currency=rec["currency"], vendor=rec.get("vendor"))
+    return {"status": "CONFIRMED", "reservation_id": payload.reservation_id, "payment": cap_res, "idempotent": bool(payload.idempotency_key)}
 
-    rec = HOLDS.get(payload.reservation_id)
+
+async def _authorize_capture(payload: CaptureRequest):
+    """Pre-capture checks and authorization; returns (hold record, authorization) or an error response."""
+    rec = await STATE.get_hold(payload.reservation_id)
     if not rec:
-        return JSONResponse({"error": "no reservation"}, status_code=404)
+        return AppJSONResponse({"error": "no reservation"}, status_code=404)
     if rec.get("status") != "APPROVED":
-        return JSONResponse({"error": "reservation not approved"}, status_code=400)
+        return AppJSONResponse({"error": "reservation not approved"}, status_code=400)
 
-    stored = PAYMENT_TOKENS.get(payload.user_id)
+    stored = await STATE.get_payment_token(payload.user_id)
     if not stored:
-        return JSONResponse({"error": "no payment token"}, status_code=400)
+        return AppJSONResponse({"error": "no payment token"}, status_code=400)
     token = payment_vault.retrieve_token(stored)
     method = PaymentMethod(type="card", token=token, label=stored.masked_pan)
 
     auth_res = await payment_processor.authorize(rec["amount_minor"], rec["currency"], method, details={"reservation_id": payload.reservation_id})
     if auth_res.get("status") != "authorized":
-        record_event(actor=payload.user_id, action="AUTHORIZED", status="error", reservation_id=payload.reservation_id, amount_minor=rec["amount_minor"], currency=rec["currency"], vendor=rec.get("vendor"))
-        return JSONResponse({"error": "authorization failed", "details": auth_res}, status_code=400)
-
-    cap_res = await payment_processor.capture(auth_res["authorization_id"])
-    rec["status"] = "CONFIRMED"
-    rec["payment_id"] = cap_res.get("payment_id")
-    record_event(actor=payload.user_id, action="CAPTURED", status="ok", reservation_id=payload.reservation_id, amount_minor=rec["amount_minor"], currency=rec["currency"], vendor=rec.get("vendor"))
-    if payload.idempotency_key:
-        IDEMPOTENCY_CAPTURE[payload.idempotency_key] = cap_res
-    return {"status": "CONFIRMED", "reservation_id": payload.reservation_id, "payment": cap_res, "idempotent": bool(payload.idempotency_key)}
+        enqueue_event(actor=payload.user_id, action="AUTHORIZED", status="error", reservation_id=payload.reservation_id, amount_minor=rec["amount_minor"], currency=rec["currency"], vendor=rec.get("vendor"))
+        return AppJSONResponse({"error": "authorization failed", "details": auth_res}, status_code=400)
+    return rec, auth_res
 
 @app.get("/", response_class=HTMLResponse, tags=["Frontend"])
 async def read_root(request: Request):
@@ -276,5 +342,8 @@ async def read_root(request: Request):
     """
     return templates.TemplateResponse("index.html", {"request": request})
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # uvloop has no Windows build; fall back to the stdlib loop there
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop=loop, http="httptools")
\ No newline at end of file
@@ -1,12 +1,38 @@
+import asyncio
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from sqlmodel import SQLModel, Field, Session, select
-from src.database import get_engine
+import orjson
+from loguru import logger
+from sqlalchemy import Index, func, text
+from sqlmodel import SQLModel, Field, select
+from src.database import get_engine, get_sessionmaker
+
+# Background writer tuning: flush at most this many events per commit, after a short coalescing window.
+AUDIT_BATCH_SIZE = 100
+AUDIT_FLUSH_INTERVAL_S = 0.01
+
+_AUDIT_QUEUE: Optional["asyncio.Queue[AuditEvent]"] = None
+_AUDIT_WRITER: Optional["asyncio.Task[None]"] = None
+
+
+# Matches list_events' ORDER BY (created_at, id) after the actor filter, so per-actor listings read
+# rows in order and stop at LIMIT instead of sorting. Unfiltered and action-only listings walk
+# ix_auditevent_created_at, which on SQLite already ends in the rowid (id).
+_RECENT_INDEX = Index("ix_audit_actor_recent", "actor", "created_at", "id")
+# Earlier (created_at, actor, action) index; the planner couldn't use it once id joined the ORDER BY
+_OBSOLETE_RECENT_INDEX = "ix_audit_recent"
 
 
 class AuditEvent(SQLModel, table=True):
+    __table_args__ = (_RECENT_INDEX,)
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    # Filled by the database (UTC CURRENT_TIMESTAMP) so event construction allocates no datetime.
+    # The INSERT-side default also covers tables created before the server default existed.
+    created_at: Optional[datetime] = Field(
+        default=None, index=True, nullable=False,
+        sa_column_kwargs={"default": func.now(), "server_default": func.now()},
+    )
     actor: str = Field(index=True)
     action: str = Field(index=True)  # e.g., PROPOSED, HELD, APPROVED, AUTHORIZED, CAPTURED, CONFIRMED, DENIED, ERROR
     status: str  # e.g., ok, denied, error
@@ -14,40 +40,116 @@ class AuditEvent(SQLModel, table=True):
     amount_minor: Optional[int] = None
     currency: Optional[str] = None
     vendor: Optional[str] = None
-    reasons: Optional[str] = None  # pipe-separated reasons for simplicity
-    details: Optional[str] = None  # lightweight JSON string if needed
+    reasons: Optional[str] = None  # JSON array of reason strings
+    details: Optional[str] = None  # JSON object
 
 
-def create_tables():
+async def create_tables():
     engine = get_engine()
-    SQLModel.metadata.create_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        # create_all skips existing tables, so add the listing index to databases that predate it
+        await conn.run_sync(_RECENT_INDEX.create, checkfirst=True)
+        await conn.execute(text(f"DROP INDEX IF EXISTS {_OBSOLETE_RECENT_INDEX}"))
 
 
-def record_event(actor: str, action: str, status: str, reservation_id: Optional[str] = None,
+def _build_event(actor: str, action: str, status: str, reservation_id: Optional[str] = None,
                  amount_minor: Optional[int] = None, currency: Optional[str] = None,
                  vendor: Optional[str] = None, reasons: Optional[List[str]] = None,
                  details: Optional[Dict[str, Any]] = None) -> AuditEvent:
-    engine = get_engine()
-    with Session(engine) as session:
-        evt = AuditEvent(
-            actor=actor,
-            action=action,
-            status=status,
-            reservation_id=reservation_id,
-            amount_minor=amount_minor,
-            currency=currency,
-            vendor=vendor,
-            reasons=("|".join(reasons) if reasons else None),
-            details=(str(details) if details else None),
-        )
+    return AuditEvent(
+        actor=actor,
+        action=action,
+        status=status,
+        reservation_id=reservation_id,
+        amount_minor=amount_minor,
+        currency=currency,
+        vendor=vendor,
+        reasons=(orjson.dumps(reasons).decode("utf-8") if reasons else None),
+        details=(orjson.dumps(details).decode("utf-8") if details else None),
+    )
+
+
+async def record_event(actor: str, action: str, status: str, reservation_id: Optional[str] = None,
+                       amount_minor: Optional[int] = None, currency: Optional[str] = None,
+                       vendor: Optional[str] = None, reasons: Optional[List[str]] = None,
+                       details: Optional[Dict[str, Any]] = None) -> AuditEvent:
+    async with get_sessionmaker()() as session:
+        evt = _build_event(actor, action, status, reservation_id, amount_minor, currency, vendor, reasons, details)
         session.add(evt)
-        session.commit()
-        session.refresh(evt)
+        await session.commit()
+        await session.refresh(evt)
         return evt
 
 
-def list_events(limit: int = 50) -> List[AuditEvent]:
-    engine = get_engine()
-    with Session(engine) as session:
-        stmt = select(AuditEvent).order_by(AuditEvent.created_at.desc()).limit(limit)
-        return list(session.exec(stmt))
\ No newline at end of file
+def enqueue_event(actor: str, action: str, status: str, reservation_id: Optional[str] = None,
+                  amount_minor: Optional[int] = None, currency: Optional[str] = None,
+                  vendor: Optional[str] = None, reasons: Optional[List[str]] = None,
+                  details: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Queue an audit event for the background writer instead of committing inline.
+    Same arguments as record_event; the row is persisted by the next batch flush.
+    """
+    if _AUDIT_QUEUE is None:
+        raise RuntimeError("Audit writer is not running. Call start_audit_writer() at startup.")
+    _AUDIT_QUEUE.put_nowait(
+        _build_event(actor, action, status, reservation_id, amount_minor, currency, vendor, reasons, details)
+    )
+
+
+async def _write_batch(queue: "asyncio.Queue[AuditEvent]", batch: List[AuditEvent]) -> None:
+    try:
+        async with get_sessionmaker()() as session:
+            session.add_all(batch)
+            await session.commit()
+    except Exception:
+        logger.bind(event="audit_write_failed").exception("Failed to persist {} audit events", len(batch))
+    finally:
+        for _ in batch:
+            queue.task_done()
+
+
+async def _audit_writer(queue: "asyncio.Queue[AuditEvent]") -> None:
+    while True:
+        batch = [await queue.get()]
+        # Give concurrent handlers a moment to enqueue so one commit covers many events.
+        await asyncio.sleep(AUDIT_FLUSH_INTERVAL_S)
+        while len(batch) < AUDIT_BATCH_SIZE and not queue.empty():
+            batch.append(queue.get_nowait())
+        await _write_batch(queue, batch)
+
+
+def start_audit_writer() -> None:
+    """Create the audit queue and launch its writer task on the running event loop."""
+    global _AUDIT_QUEUE, _AUDIT_WRITER
+    if _AUDIT_WRITER is not None and not _AUDIT_WRITER.done():
+        return
+    _AUDIT_QUEUE = asyncio.Queue()
+    _AUDIT_WRITER = asyncio.create_task(_audit_writer(_AUDIT_QUEUE))
+
+
+async def stop_audit_writer() -> None:
+    """Flush pending audit events and stop the writer task."""
+    global _AUDIT_QUEUE, _AUDIT_WRITER
+    if _AUDIT_QUEUE is None or _AUDIT_WRITER is None:
+        return
+    await _AUDIT_QUEUE.join()
+    _AUDIT_WRITER.cancel()
+    try:
+        await _AUDIT_WRITER
+    except asyncio.CancelledError:
+        pass
+    _AUDIT_QUEUE = None
+    _AUDIT_WRITER = None
+
+
+async def list_events(limit: int = 50, actor: Optional[str] = None, action: Optional[str] = None) -> List[AuditEvent]:
+    async with get_sessionmaker()() as session:
+        stmt = select(AuditEvent)
+        if actor:
+            stmt = stmt.where(AuditEvent.actor == actor)
+        if action:
+            stmt = stmt.where(AuditEvent.action == action)
+        # id breaks ties between events committed within the same second
+        stmt = stmt.order_by(AuditEvent.created_at.desc(), AuditEvent.id.desc()).limit(limit)
+        return list(await session.exec(stmt))
\ No newline at end of file
@@ -1,22 +1,42 @@
+import asyncio
 from typing import Dict, Any, List
 
 from loguru import logger
 
 
+async def _book_one(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Placeholder: Reserve a single itinerary item (flight, hotel, or activity).
+    """
+    # In production, call the matching provider client and payment processor
+    return {"status": "reserved", "item": item}
+
+
 async def process_reservations(itinerary: List[Dict[str, Any]], authorized: bool) -> List[Dict[str, Any]]:
     """
     Placeholder: Drive booking sequence for flights, hotels, and activities.
+    Items are booked concurrently; a failing item is reported without aborting the others.
     """
     if not authorized:
         logger.bind(event="booking_skip").warning("Booking skipped due to missing authorization")
         return [{"status": "skipped", "reason": "not authorized"}]
     logger.bind(event="booking_start").info("Starting reservations processing")
-    # In production, call provider clients and payment processor
-    return [{"status": "reserved", "items": len(itinerary)}]
+    results = await asyncio.gather(*[_book_one(item) for item in itinerary], return_exceptions=True)
+    return [
+        {"status": "error", "item": item, "reason": str(res)} if isinstance(res, BaseException) else res
+        for item, res in zip(itinerary, results)
+    ]
+
+
+async def _send_confirmation(booking: Dict[str, Any]) -> None:
+    """
+    Placeholder: Email the confirmation and create the calendar invite for one booking.
+    """
 
 
 async def send_confirmations(bookings: List[Dict[str, Any]]) -> None:
     logger.bind(event="booking_confirmations").info("Sending confirmations and calendar invites")
+    await asyncio.gather(*[_send_confirmation(b) for b in bookings])
 
 
 async def cancel_and_refund(booking_id: str) -> Dict[str, Any]:
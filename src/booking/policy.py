@@ -1,6 +1,10 @@
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import Callable, FrozenSet, List, Optional, Dict, Any, Tuple
 from pydantic import BaseModel, Field
 
+# (amount_minor, currency, vendor) -> None when allowed, otherwise the denial reasons
+PolicyValidator = Callable[[int, str, Optional[str]], Optional[Tuple[str, ...]]]
+
 
 class BookingPolicy(BaseModel):
     """
@@ -17,6 +21,37 @@ class BookingPolicy(BaseModel):
     date_window_days: int = 3
     require_two_step_payment: bool = True
 
+    def compile(self) -> PolicyValidator:
+        """
+        Return a validator specialized for this policy's budget, currency and vendor list.
+        Validators are cached by policy shape, so repeat requests with the same policy reuse one.
+        """
+        vendors = frozenset(self.allowed_vendors) if self.allowed_vendors is not None else None
+        return _compile_policy(self.max_budget_minor, self.currency, vendors)
+
+
+@lru_cache(maxsize=256)
+def _compile_policy(max_budget_minor: int, policy_currency: str, allowed_vendors: Optional[FrozenSet[str]]) -> PolicyValidator:
+    expected_currency = policy_currency.upper() if policy_currency else None
+
+    def validate(amount_minor: int, currency: str, vendor: Optional[str]) -> Optional[Tuple[str, ...]]:
+        budget_ok = not max_budget_minor or amount_minor <= max_budget_minor
+        currency_ok = expected_currency is None or currency.upper() == expected_currency
+        vendor_ok = allowed_vendors is None or vendor is None or vendor in allowed_vendors
+        if budget_ok and currency_ok and vendor_ok:
+            return None
+
+        reasons: List[str] = []
+        if not budget_ok:
+            reasons.append(f"amount {amount_minor} exceeds cap {max_budget_minor}")
+        if not currency_ok:
+            reasons.append(f"currency {currency} not allowed; expected {policy_currency}")
+        if not vendor_ok:
+            reasons.append(f"vendor {vendor} not in allowed list")
+        return tuple(reasons)
+
+    return validate
+
 
 def check_policy(amount_minor: int, currency: str, vendor: Optional[str], policy: BookingPolicy) -> Dict[str, Any]:
     """
@@ -24,20 +59,7 @@ def check_policy(amount_minor: int, currency: str, vendor: Optional[str], policy
     - Checks budget cap and currency match
     - If allowed_vendors provided, vendor must be in list
     """
-    reasons: List[str] = []
-    ok = True
-
-    if policy.max_budget_minor and amount_minor > policy.max_budget_minor:
-        ok = False
-        reasons.append(f"amount {amount_minor} exceeds cap {policy.max_budget_minor}")
-
-    if policy.currency and currency.upper() != policy.currency.upper():
-        ok = False
-        reasons.append(f"currency {currency} not allowed; expected {policy.currency}")
-
-    if policy.allowed_vendors is not None and vendor is not None:
-        if vendor not in policy.allowed_vendors:
-            ok = False
-            reasons.append(f"vendor {vendor} not in allowed list")
-
-    return {"ok": ok, "reasons": reasons}
\ No newline at end of file
+    reasons = policy.compile()(amount_minor, currency, vendor)
+    if reasons is None:
+        return {"ok": True, "reasons": []}
+    return {"ok": False, "reasons": list(reasons)}
\ No newline at end of file
@@ -1,15 +1,37 @@
+import asyncio
 import os
 import sys
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
+import httpx
+import numpy as np
 import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
 from tabulate import tabulate
+from urllib3.util.retry import Retry
 
 
 EXCHANGE_API = "https://api.exchangerate.host/latest"
 RESTCOUNTRIES_API = "https://restcountries.com/v3.1/name/{country}?fields=name,currencies"
 
+# Rates move at most hourly; serve repeat queries for the same base/symbols from memory
+RATES_CACHE_TTL_S = 300
+_RATES_CACHE: TTLCache = TTLCache(maxsize=256, ttl=RATES_CACHE_TTL_S)
+
+
+def _build_session() -> requests.Session:
+    """Shared HTTP session so repeat calls reuse pooled keep-alive connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=Retry(total=3, backoff_factor=0.2))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_SESSION = _build_session()
+
 
 class RateLimitError(Exception):
     pass
@@ -41,13 +63,8 @@ def validate_amount(value: str) -> float:
         raise ValueError("Invalid amount. Please enter a valid number (e.g., 125000.50).")
 
 
-def resolve_currency_from_country(country_name: str, timeout: int = 10) -> Tuple[str, str]:
-    """Resolve currency code and name from a given country using RestCountries API."""
-    try:
-        resp = requests.get(RESTCOUNTRIES_API.format(country=country_name), timeout=timeout)
-    except requests.RequestException as e:
-        raise ConnectionError(f"Network error while resolving country currency: {e}")
-
+def _parse_country_response(resp, country_name: str) -> Tuple[str, str]:
+    """Validate a RestCountries response (requests or httpx) and pick its first currency."""
     if resp.status_code == 429:
         raise RateLimitError("Rate limit reached when calling RestCountries API. Try again later.")
     if resp.status_code >= 400:
@@ -67,14 +84,8 @@ def resolve_currency_from_country(country_name: str, timeout: int = 10) -> Tuple
     return code, name
 
 
-def fetch_exchange_rates(base: str, symbols: List[str], timeout: int = 12) -> Dict[str, float]:
-    """Fetch latest exchange rates for given symbols with a base currency."""
-    params = {"base": base, "symbols": ",".join(symbols)}
-    try:
-        resp = requests.get(EXCHANGE_API, params=params, timeout=timeout)
-    except requests.RequestException as e:
-        raise ConnectionError(f"Network error while fetching exchange rates: {e}")
-
+def _parse_rates_response(resp) -> Dict[str, float]:
+    """Validate an exchange rate response (requests or httpx) and return its rates."""
     if resp.status_code == 429:
         raise RateLimitError("Rate limit reached when calling exchange rate API. Try again later.")
     if resp.status_code >= 400:
@@ -84,12 +95,106 @@ def fetch_exchange_rates(base: str, symbols: List[str], timeout: int = 12) -> Di
     rates = payload.get("rates")
     if not isinstance(rates, dict) or not rates:
         raise ValueError("Invalid response: no 'rates' found.")
+    return rates
+
 
-    # Ensure all requested symbols are present
+def ensure_symbols(rates: Dict[str, float], symbols: List[str]) -> None:
+    """Ensure all requested symbols are present in the fetched rates."""
     missing = [s for s in symbols if s not in rates]
     if missing:
         raise ValueError(f"Missing rates for symbols: {', '.join(missing)}. Check currency codes.")
-    return rates
+
+
+def resolve_currency_from_country(country_name: str, timeout: int = 10) -> Tuple[str, str]:
+    """Resolve currency code and name from a given country using RestCountries API."""
+    try:
+        resp = _SESSION.get(RESTCOUNTRIES_API.format(country=country_name), timeout=timeout)
+    except requests.RequestException as e:
+        raise ConnectionError(f"Network error while resolving country currency: {e}")
+    return _parse_country_response(resp, country_name)
+
+
+def _rates_cache_key(base: str, symbols: Optional[List[str]]) -> Tuple[str, Optional[Tuple[str, ...]]]:
+    return base, tuple(sorted(symbols)) if symbols else None
+
+
+def fetch_exchange_rates(base: str, symbols: List[str], timeout: int = 12) -> Dict[str, float]:
+    """Fetch latest exchange rates for given symbols with a base currency (cached for RATES_CACHE_TTL_S)."""
+    cache_key = _rates_cache_key(base, symbols)
+    cached = _RATES_CACHE.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
+    params = {"base": base, "symbols": ",".join(symbols)}
+    try:
+        resp = _SESSION.get(EXCHANGE_API, params=params, timeout=timeout)
+    except requests.RequestException as e:
+        raise ConnectionError(f"Network error while fetching exchange rates: {e}")
+
+    rates = _parse_rates_response(resp)
+    ensure_symbols(rates, symbols)
+    _RATES_CACHE[cache_key] = rates
+    return dict(rates)
+
+
+async def resolve_currency_from_country_async(client: httpx.AsyncClient, country_name: str) -> Tuple[str, str]:
+    """Async variant of resolve_currency_from_country using a shared httpx client."""
+    try:
+        resp = await client.get(RESTCOUNTRIES_API.format(country=country_name))
+    except httpx.HTTPError as e:
+        raise ConnectionError(f"Network error while resolving country currency: {e}")
+    return _parse_country_response(resp, country_name)
+
+
+async def fetch_exchange_rates_async(client: httpx.AsyncClient, base: str, symbols: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Async variant of fetch_exchange_rates using a shared httpx client.
+    With symbols=None, all rates for the base currency are returned. Shares the sync cache.
+    """
+    cache_key = _rates_cache_key(base, symbols)
+    cached = _RATES_CACHE.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
+    params = {"base": base}
+    if symbols:
+        params["symbols"] = ",".join(symbols)
+    try:
+        resp = await client.get(EXCHANGE_API, params=params)
+    except httpx.HTTPError as e:
+        raise ConnectionError(f"Network error while fetching exchange rates: {e}")
+
+    rates = _parse_rates_response(resp)
+    if symbols:
+        ensure_symbols(rates, symbols)
+    _RATES_CACHE[cache_key] = rates
+    return dict(rates)
+
+
+async def fetch_country_currency_and_rates(
+    country_name: str,
+    base: str,
+    timeout: int = 12,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Tuple[Tuple[str, str], Dict[str, float]]:
+    """
+    Resolve the country's currency and fetch the base currency's rates concurrently.
+    The target code is unknown until the country resolves, so all rates for the base are fetched.
+    transport is passed to the httpx client (e.g. a MockTransport in tests).
+    """
+    async with httpx.AsyncClient(timeout=timeout, transport=transport) as client:
+        country, rates = await asyncio.gather(
+            resolve_currency_from_country_async(client, country_name),
+            fetch_exchange_rates_async(client, base),
+        )
+    return country, rates
+
+
+def convert_amounts(base_amount: float, rates: Dict[str, float], symbols: List[str]) -> List[Tuple[str, float, float]]:
+    """Convert base_amount into every symbol in one vectorized multiply. Returns (code, rate, converted)."""
+    rate_arr = np.fromiter((rates[code] for code in symbols), dtype=np.float64, count=len(symbols))
+    converted_arr = rate_arr * base_amount
+    return list(zip(symbols, rate_arr.tolist(), converted_arr.tolist()))
 
 
 def build_markdown_report(
@@ -140,14 +245,15 @@ def main():
             raise ValueError("Base currency code must be 3 letters (e.g., USD, EUR, JPY).")
 
         mode = input("Do you want to choose user country? (y/n): ").strip().lower()
+        country_name = ""
         target_currency_code = ""
         target_currency_name = ""
         extra_codes: List[str] = []
 
         if mode == "y":
             country_name = input("Enter user country name (e.g., Indonesia): ").strip()
-            target_currency_code, target_currency_name = resolve_currency_from_country(country_name)
-            print(f"Country '{country_name}' -> User currency: {target_currency_code} ({target_currency_name})")
+            if not country_name:
+                raise ValueError("Country name cannot be empty.")
         else:
             target_currency_code = normalize_currency_code(input("Enter target currency code (e.g., IDR): ").strip())
             if len(target_currency_code) != 3:
@@ -161,19 +267,25 @@ def main():
                 if len(c) != 3:
                     raise ValueError(f"Invalid currency code: {c}")
 
-        # Prepare symbols list for API call
-        symbols = [target_currency_code] + [c for c in extra_codes if c != target_currency_code]
         start_time = datetime.now()
-
-        rates = fetch_exchange_rates(base_currency, symbols)
+        if country_name:
+            # Country lookup and rate fetch are independent; run them concurrently
+            (target_currency_code, target_currency_name), rates = asyncio.run(
+                fetch_country_currency_and_rates(country_name, base_currency)
+            )
+            print(f"Country '{country_name}' -> User currency: {target_currency_code} ({target_currency_name})")
+            symbols = [target_currency_code] + [c for c in extra_codes if c != target_currency_code]
+            ensure_symbols(rates, symbols)
+        else:
+            # Prepare symbols list for API call
+            symbols = [target_currency_code] + [c for c in extra_codes if c != target_currency_code]
+            rates = fetch_exchange_rates(base_currency, symbols)
 
         # Build conversions list: (code, name, rate, converted_amount)
-        conversions: List[Tuple[str, str, float, float]] = []
-        for code in symbols:
-            rate = float(rates[code])
-            converted = base_amount * rate
-            name = target_currency_name if code == target_currency_code else code
-            conversions.append((code, name, rate, converted))
+        conversions: List[Tuple[str, str, float, float]] = [
+            (code, target_currency_name if code == target_currency_code else code, rate, converted)
+            for code, rate, converted in convert_amounts(base_amount, rates, symbols)
+        ]
 
         end_time = datetime.now()
 
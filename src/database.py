@@ -1,5 +1,8 @@
 from typing import Optional
-from sqlmodel import SQLModel, Field, create_engine
+from sqlmodel import SQLModel, Field
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 import os
 
 
@@ -17,13 +20,58 @@ class Preference(SQLModel, table=True):
     activities: Optional[str] = None
 
 
-def get_engine():
-    db_url = os.getenv("DATABASE_URL", "sqlite:///wandergenie.db")
-    connect_args = {"check_same_thread": False} if db_url.startswith("sqlite") else {}
-    return create_engine(db_url, echo=False, connect_args=connect_args)
+_ENGINE: Optional[AsyncEngine] = None
+_SESSIONMAKER: Optional[async_sessionmaker] = None
 
 
-def init_db():
+def _async_url(db_url: str) -> str:
+    """
+    Map a plain sqlite DATABASE_URL onto aiosqlite (pinned in requirements).
+    Other databases must name an installed async driver themselves, e.g. postgresql+asyncpg://.
+    """
+    if db_url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + db_url[len("sqlite:"):]
+    return db_url
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers proceed during audit writes; synchronous=NORMAL drops the per-commit fsync
+    (durable at checkpoint). Applied on every new pooled connection.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Return the process-wide async engine, creating it on first use.
+    The engine owns the connection pool, so it must be shared rather than rebuilt per call.
+    """
+    global _ENGINE
+    if _ENGINE is None:
+        db_url = _async_url(os.getenv("DATABASE_URL", "sqlite:///wandergenie.db"))
+        if db_url.startswith("sqlite"):
+            _ENGINE = create_async_engine(db_url, echo=False)
+            event.listen(_ENGINE.sync_engine, "connect", _set_sqlite_pragmas)
+        else:
+            _ENGINE = create_async_engine(db_url, echo=False, pool_size=20, max_overflow=10, pool_pre_ping=True)
+    return _ENGINE
+
+
+def get_sessionmaker() -> async_sessionmaker:
+    global _SESSIONMAKER
+    if _SESSIONMAKER is None:
+        _SESSIONMAKER = async_sessionmaker(get_engine(), class_=AsyncSession, expire_on_commit=False)
+    return _SESSIONMAKER
+
+
+async def init_db():
     engine = get_engine()
-    SQLModel.metadata.create_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
     return engine
\ No newline at end of file
@@ -1,15 +1,127 @@
+import asyncio
+import functools
 import os
-from groq import Groq
+from groq import AsyncGroq
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from typing import List
-from .providers.wikipedia import fetch_attractions
+from loguru import logger
+from typing import AsyncIterator, List
+from .providers.wikipedia import ATTRACTIONS_CACHE_TTL_S, fetch_attractions
 
 # Load environment variables from project root .env explicitly
 _project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 _env_path = os.path.join(_project_root, ".env")
 load_dotenv(dotenv_path=_env_path, override=True)
+logger.bind(event="llm_config").info("GROQ_API_KEY present: {}", bool(os.environ.get("GROQ_API_KEY")))
 
-def generate_vacation_plan(preferences: dict) -> str:
+MODEL_NAME = os.environ.get("LLM_MODEL", "llama-3.1-8b-instant")
+try:
+    TEMPERATURE = float(os.environ.get("LLM_TEMPERATURE", "0.3"))
+except ValueError:
+    TEMPERATURE = 0.3
+
+# Cap in-flight Groq requests per process so a burst or one slow upstream can't exhaust the shared pool.
+# Streaming calls hold a permit only while the upstream stream is opened, not while it is drained.
+GROQ_MAX_CONCURRENCY = 8
+_GROQ_SEM = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+
+# Fully static instructions so providers can reuse the cached prompt prefix across requests
+_SYSTEM_PROMPT = (
+    "You are WanderGenie, an expert travel agent specializing in creating "
+    "personalized vacation itineraries. Your goal is to generate a detailed, "
+    "day-by-day plan tailored to the user's preferences.\n\n"
+    "Strictly return an HTML table only (no extra text). Columns: "
+    "Day, Time (HH:MM–HH:MM), Agenda, Cost (local currency).\n"
+    "Break down each day into multiple rows (one row per activity with realistic start and end times).\n"
+    "Provide approximate costs per activity in the destination's local currency, using numeric values (e.g., JPY 1500).\n"
+    "Do NOT include a global footer total row; totals will be computed per-day by the client.\n"
+    "Apply HTML attributes/classes suitable for Bootstrap tables: <table class='table table-striped table-bordered plan-table'>.\n"
+)
+_CONTEXT_HEADER = "Destination context (public data):\n"
+
+# Opt-in prompt-caching breakpoint on the static system prompt; off by default because
+# providers/models that don't accept structured system content reject the request
+PROMPT_CACHE_HINT = os.environ.get("LLM_PROMPT_CACHE_HINT", "").lower() in ("1", "true", "yes")
+_SYSTEM_MESSAGE = (
+    {
+        "role": "system",
+        "content": [{"type": "text", "text": _SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}],
+    }
+    if PROMPT_CACHE_HINT
+    else {"role": "system", "content": _SYSTEM_PROMPT}
+)
+_NO_CONTEXT = "- No external context found"
+
+# Rendered context blocks per destination; attractions do not depend on interests or duration.
+# Expires with the attractions cache so stale entries fall through to its refresh/ETag revalidation.
+_CONTEXT_CACHE: TTLCache = TTLCache(maxsize=256, ttl=ATTRACTIONS_CACHE_TTL_S)
+
+# HTML table fallback so the UI remains functional when the LLM call fails
+_FALLBACK_PLAN_HTML = (
+    "<table class='table table-striped table-bordered plan-table'>"
+    "<thead><tr><th>Day</th><th>Time</th><th>Agenda</th><th>Cost (local)</th></tr></thead>"
+    "<tbody>"
+    "<tr><td>Day 1</td><td>09:00–11:00</td><td>City walking tour</td><td>JPY 2500</td></tr>"
+    "<tr><td>Day 1</td><td>12:00–13:30</td><td>Lunch at local restaurant</td><td>JPY 1800</td></tr>"
+    "<tr><td>Day 2</td><td>10:00–12:00</td><td>Visit landmark museum</td><td>JPY 1500</td></tr>"
+    "<tr><td>Day 2</td><td>14:00–16:00</td><td>Parks and gardens</td><td>JPY 0</td></tr>"
+    "</tbody></table>"
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client() -> AsyncGroq:
+    """Build the Groq client once; its HTTP connection pool is reused across calls."""
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY environment variable not set.")
+    return AsyncGroq(api_key=api_key)
+
+
+async def _context_for(destination: str) -> str:
+    """Render the attractions context block for a destination, memoized when non-empty."""
+    key = destination.strip().casefold()
+    if not key:
+        return _NO_CONTEXT
+    cached = _CONTEXT_CACHE.get(key)
+    if cached is not None:
+        return cached
+    attractions = await fetch_attractions(destination, limit=6)
+    context_block = "\n".join(
+        f"- {name}: {a.get('desc', '').strip()}" for a in attractions if (name := a.get("name"))
+    )
+    if not context_block:
+        return _NO_CONTEXT
+    _CONTEXT_CACHE[key] = context_block
+    return context_block
+
+
+async def _build_messages(preferences: dict) -> List[dict]:
+    """Build the chat messages for a plan request, fetching destination context concurrently."""
+    # Collect public context for grounding; the lookup runs while the user prompt is built
+    destination = preferences.get("destination", "")
+    context_task = asyncio.create_task(_context_for(destination))
+
+    user_prompt = (
+        f"Please generate a vacation plan based on the following preferences:\n"
+        f"- Destination: {destination or 'not specified'}\n"
+        f"- Duration: {preferences.get('duration', 'not specified')} days (build a schedule with realistic times each day)\n"
+        f"- Budget: {preferences.get('budget', 'not specified')} (keep costs aligned with this level)\n"
+        f"- Interests: {', '.join(preferences.get('interests', [])) if preferences.get('interests') else 'not specified'}\n\n"
+        "Return only the HTML <table> as specified. No explanations, no markdown, no code fences."
+    )
+
+    context_block = await context_task
+
+    # Per-destination context goes in its own message after the static prefix
+    return [
+        _SYSTEM_MESSAGE,
+        {"role": "system", "content": _CONTEXT_HEADER + context_block},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+async def generate_vacation_plan(preferences: dict) -> str:
     """
     Generates a personalized vacation plan using the Groq API based on user preferences.
 
@@ -21,77 +133,62 @@ def generate_vacation_plan(preferences: dict) -> str:
         A string containing the AI-generated vacation plan.
     """
     try:
-        api_key = os.environ.get("GROQ_API_KEY")
-        print(f"Debug GROQ key present: {bool(api_key)}; env path: {_env_path}")
-        if not api_key:
-            raise ValueError("GROQ_API_KEY environment variable not set.")
-
-        # Collect public context for grounding
-        destination = preferences.get("destination", "")
-        attractions = fetch_attractions(destination, limit=6)
-        attractions_lines: List[str] = [
-            f"- {a['name']}: {a.get('desc','').strip()}" for a in attractions if a.get('name')
-        ]
-        context_block = "\n".join(attractions_lines) if attractions_lines else "- No external context found"
-
-        client = Groq(api_key=api_key)
-
-        model_name = os.environ.get("LLM_MODEL", "llama-3.1-8b-instant")
-        try:
-            temperature = float(os.environ.get("LLM_TEMPERATURE", "0.3"))
-        except ValueError:
-            temperature = 0.3
-
-        system_prompt = (
-            "You are WanderGenie, an expert travel agent specializing in creating "
-            "personalized vacation itineraries. Your goal is to generate a detailed, "
-            "day-by-day plan tailored to the user's preferences.\n\n"
-            "Strictly return an HTML table only (no extra text). Columns: "
-            "Day, Time (HH:MM–HH:MM), Agenda, Cost (local currency).\n"
-            "Break down each day into multiple rows (one row per activity with realistic start and end times).\n"
-            "Provide approximate costs per activity in the destination's local currency, using numeric values (e.g., JPY 1500).\n"
-            "Do NOT include a global footer total row; totals will be computed per-day by the client.\n"
-            "Apply HTML attributes/classes suitable for Bootstrap tables: <table class='table table-striped table-bordered plan-table'>.\n\n"
-            "Destination context (public data, optional):\n" + context_block + "\n"
-        )
-
-        user_prompt = (
-            f"Please generate a vacation plan based on the following preferences:\n"
-            f"- Destination: {destination or 'not specified'}\n"
-            f"- Duration: {preferences.get('duration', 'not specified')} days (build a schedule with realistic times each day)\n"
-            f"- Budget: {preferences.get('budget', 'not specified')} (keep costs aligned with this level)\n"
-            f"- Interests: {', '.join(preferences.get('interests', [])) if preferences.get('interests') else 'not specified'}\n\n"
-            "Return only the HTML <table> as specified. No explanations, no markdown, no code fences."
-        )
-
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            model=model_name,
-            temperature=temperature,
-            max_tokens=2048,
-            top_p=1,
-            stop=None,
-            stream=False,
-        )
+        client = _get_client()
+        messages = await _build_messages(preferences)
+
+        async with _GROQ_SEM:
+            chat_completion = await client.chat.completions.create(
+                messages=messages,
+                model=MODEL_NAME,
+                temperature=TEMPERATURE,
+                max_tokens=2048,
+                top_p=1,
+                stop=None,
+                stream=False,
+            )
 
         return chat_completion.choices[0].message.content
 
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        # Provide an HTML table fallback so the UI remains functional
-        return (
-            "<table class='table table-striped table-bordered plan-table'>"
-            "<thead><tr><th>Day</th><th>Time</th><th>Agenda</th><th>Cost (local)</th></tr></thead>"
-            "<tbody>"
-            "<tr><td>Day 1</td><td>09:00–11:00</td><td>City walking tour</td><td>JPY 2500</td></tr>"
-            "<tr><td>Day 1</td><td>12:00–13:30</td><td>Lunch at local restaurant</td><td>JPY 1800</td></tr>"
-            "<tr><td>Day 2</td><td>10:00–12:00</td><td>Visit landmark museum</td><td>JPY 1500</td></tr>"
-            "<tr><td>Day 2</td><td>14:00–16:00</td><td>Parks and gardens</td><td>JPY 0</td></tr>"
-            "</tbody></table>"
-        )
+    except Exception:
+        logger.bind(event="plan_generation_failed").exception("Plan generation failed; returning fallback table")
+        return _FALLBACK_PLAN_HTML
+
+
+async def stream_vacation_plan(preferences: dict) -> AsyncIterator[str]:
+    """
+    Streaming variant of generate_vacation_plan: yields the HTML table as the model produces it.
+
+    Falls back to the static table if the call fails before any content was sent.
+    """
+    sent_any = False
+    try:
+        client = _get_client()
+        messages = await _build_messages(preferences)
+
+        # Drain outside the semaphore: it is paced by the browser, and a slow reader must not
+        # hold a permit that other /api/plan and /api/plan/stream callers are waiting on
+        async with _GROQ_SEM:
+            stream = await client.chat.completions.create(
+                messages=messages,
+                model=MODEL_NAME,
+                temperature=TEMPERATURE,
+                max_tokens=2048,
+                top_p=1,
+                stop=None,
+                stream=True,
+            )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            piece = chunk.choices[0].delta.content
+            if piece:
+                sent_any = True
+                yield piece
+
+    except Exception:
+        logger.bind(event="plan_stream_failed").exception("Plan streaming failed")
+        if not sent_any:
+            yield _FALLBACK_PLAN_HTML
 
 if __name__ == '__main__':
     # Example usage for testing
@@ -103,6 +200,6 @@ if __name__ == '__main__':
     }
     
     print("Generating a sample vacation plan...")
-    plan = generate_vacation_plan(test_preferences)
+    plan = asyncio.run(generate_vacation_plan(test_preferences))
     print("\n--- Generated Plan ---\n")
     print(plan)
\ No newline at end of file
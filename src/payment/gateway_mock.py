@@ -3,8 +3,13 @@ from typing import Dict, Any, Optional
 
 
 class MockGatewayClient:
+    def __init__(self, latency_s: float = 0.0):
+        # Simulated gateway round-trip; opt in with e.g. latency_s=0.05.
+        self._latency = latency_s
+
     async def authorize(self, amount_minor: int, currency: str, method, details: Dict[str, Any]) -> Dict[str, Any]:
-        await asyncio.sleep(0.05)
+        if self._latency:
+            await asyncio.sleep(self._latency)
         return {
             "status": "authorized",
             "authorization_id": "auth_12345",
@@ -15,9 +20,11 @@ class MockGatewayClient:
         }
 
     async def capture(self, authorization_id: str) -> Dict[str, Any]:
-        await asyncio.sleep(0.05)
+        if self._latency:
+            await asyncio.sleep(self._latency)
         return {"status": "captured", "payment_id": "pay_67890", "authorization_id": authorization_id}
 
     async def refund(self, payment_id: str, amount_minor: Optional[int] = None) -> Dict[str, Any]:
-        await asyncio.sleep(0.05)
+        if self._latency:
+            await asyncio.sleep(self._latency)
         return {"status": "refunded", "payment_id": payment_id, "amount_minor": amount_minor}
\ No newline at end of file
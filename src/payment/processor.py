@@ -3,6 +3,11 @@ from typing import Optional, Dict, Any
 
 from loguru import logger
 
+# Bound once at import; binding per call allocates a new logger each time
+_log_authorize = logger.bind(event="payment_authorize")
+_log_capture = logger.bind(event="payment_capture")
+_log_refund = logger.bind(event="payment_refund")
+
 
 @dataclass
 class PaymentMethod:
@@ -21,13 +26,13 @@ class PaymentProcessor:
         self.gateway = gateway_client
 
     async def authorize(self, amount_minor: int, currency: str, method: PaymentMethod, details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        logger.bind(event="payment_authorize").info("Authorizing payment")
+        _log_authorize.info("Authorizing payment")
         return await self.gateway.authorize(amount_minor, currency, method, details or {})
 
     async def capture(self, authorization_id: str) -> Dict[str, Any]:
-        logger.bind(event="payment_capture").info("Capturing payment")
+        _log_capture.info("Capturing payment")
         return await self.gateway.capture(authorization_id)
 
     async def refund(self, payment_id: str, amount_minor: Optional[int] = None) -> Dict[str, Any]:
-        logger.bind(event="payment_refund").info("Refunding payment")
+        _log_refund.info("Refunding payment")
         return await self.gateway.refund(payment_id, amount_minor)
\ No newline at end of file
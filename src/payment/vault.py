@@ -1,9 +1,19 @@
 from dataclasses import dataclass
 from typing import Optional
+import hashlib
 import os
 
+from cachetools import TTLCache
 from loguru import logger
-from src.security.crypto import encrypt_str, decrypt_str, mask_card
+from src.security.crypto import encrypt_str, decrypt_str, get_fernet, mask_card
+
+# Decrypted tokens are kept in process memory for roughly a hold's lifetime
+TOKEN_CACHE_TTL_S = 300
+TOKEN_CACHE_MAXSIZE = 10_000
+
+# Bound once at import; binding per call allocates a new logger each time
+_log_store = logger.bind(event="payment_token_store")
+_log_retrieve = logger.bind(event="payment_token_retrieve")
 
 
 @dataclass
@@ -24,15 +34,22 @@ class PaymentVault:
         if not secret:
             raise RuntimeError("ENCRYPTION_SECRET is not set. Configure .env before using PaymentVault.")
         self._secret = secret
+        # Derive the key up front so the first store/retrieve doesn't pay for the KDF
+        get_fernet(secret)
+        # Keyed by a hash of the ciphertext so the cache key itself reveals nothing
+        self._token_cache: TTLCache = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE, ttl=TOKEN_CACHE_TTL_S)
 
     def store_token(self, gateway_token: str, masked_pan: str, brand: Optional[str] = None) -> StoredPaymentToken:
         enc = encrypt_str(gateway_token, self._secret)
-        logger.bind(event="payment_token_store").info("Stored encrypted payment token")
+        _log_store.info("Stored encrypted payment token")
         return StoredPaymentToken(token=enc, masked_pan=masked_pan, brand=brand)
 
     def retrieve_token(self, stored: StoredPaymentToken) -> str:
-        token = decrypt_str(stored.token, self._secret)
-        logger.bind(event="payment_token_retrieve").info("Retrieved decrypted payment token")
+        cache_key = hashlib.sha256(stored.token.encode("utf-8")).hexdigest()
+        token = self._token_cache.get(cache_key)
+        if token is None:
+            token = self._token_cache[cache_key] = decrypt_str(stored.token, self._secret)
+        _log_retrieve.info("Retrieved decrypted payment token")
         return token
 
     @staticmethod
@@ -1,16 +1,62 @@
-import requests
-from typing import List, Dict
+import re
+import httpx
+import orjson
+from typing import List, Dict, Optional
 
+from cachetools import LRUCache, TTLCache
 
-def fetch_attractions(destination: str, limit: int = 6) -> List[Dict[str, str]]:
+# Attraction search results change slowly; keep successful lookups for a day
+ATTRACTIONS_CACHE_TTL_S = 24 * 3600
+_ATTRACTIONS_CACHE: TTLCache = TTLCache(maxsize=512, ttl=ATTRACTIONS_CACHE_TTL_S)
+# Last ETag and results per lookup, outliving the TTL so expired entries can be revalidated with a 304
+_ETAGS: LRUCache = LRUCache(maxsize=512)
+
+# Search-highlight markup Wikipedia wraps around matched terms in snippets
+_SEARCHMATCH_RE = re.compile(r'<span class="searchmatch">|</span>')
+
+_HTTP: Optional[httpx.AsyncClient] = None
+
+
+def _get_http() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it on first use (or after close_http_client()).
+    Lookups reuse one pooled, multiplexed HTTP/2 connection.
+    """
+    global _HTTP
+    if _HTTP is None:
+        _HTTP = httpx.AsyncClient(
+            http2=True,
+            # Fail fast on connect stalls; allow longer for the response body
+            timeout=httpx.Timeout(8.0, connect=2.0),
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=8),
+            headers={"User-Agent": "WanderGenie/1.0 (LLM Portfolio)"},
+        )
+    return _HTTP
+
+
+async def close_http_client() -> None:
+    """Close the shared client's pooled connections; the next lookup builds a fresh one."""
+    global _HTTP
+    if _HTTP is not None:
+        client, _HTTP = _HTTP, None
+        await client.aclose()
+
+
+async def fetch_attractions(destination: str, limit: int = 6) -> List[Dict[str, str]]:
     """
     Fetch a small set of relevant attractions using the Wikipedia search API.
 
     This is a lightweight, public data source to seed the LLM with context.
     We intentionally keep this simple and avoid heavy scraping or parsing.
+    Non-empty results are cached per normalized destination; failures are not cached.
+    Once the cache entry expires, it is revalidated with If-None-Match when the response carried an ETag.
     """
     if not destination:
         return []
+    cache_key = (destination.strip().casefold(), limit)
+    cached = _ATTRACTIONS_CACHE.get(cache_key)
+    if cached is not None:
+        return list(cached)
     try:
         params = {
             "action": "query",
@@ -18,18 +64,30 @@ def fetch_attractions(destination: str, limit: int = 6) -> List[Dict[str, str]]:
             "srsearch": f"{destination} notable attractions OR landmarks",
             "format": "json",
             "srlimit": str(limit),
+            # Only title and snippet are used; skip the other per-hit fields and search metadata
+            "srprop": "snippet",
+            "srinfo": "",
         }
-        headers = {"User-Agent": "WanderGenie/1.0 (LLM Portfolio)"}
-        resp = requests.get("https://en.wikipedia.org/w/api.php", params=params, headers=headers, timeout=10)
+        validator = _ETAGS.get(cache_key)
+        headers = {"If-None-Match": validator[0]} if validator else None
+        resp = await _get_http().get("https://en.wikipedia.org/w/api.php", params=params, headers=headers)
+        if resp.status_code == 304 and validator:
+            _ATTRACTIONS_CACHE[cache_key] = validator[1]
+            return list(validator[1])
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
         results = data.get("query", {}).get("search", [])
         attractions: List[Dict[str, str]] = []
         for item in results:
             title = item.get("title", "")
-            snippet = item.get("snippet", "").replace("<span class=\"searchmatch\">", "").replace("</span>", "")
+            snippet = _SEARCHMATCH_RE.sub("", item.get("snippet", ""))
             if title:
                 attractions.append({"name": title, "desc": snippet})
-        return attractions
+        if attractions:
+            _ATTRACTIONS_CACHE[cache_key] = attractions
+            etag = resp.headers.get("ETag")
+            if etag:
+                _ETAGS[cache_key] = (etag, attractions)
+        return list(attractions)
     except Exception:
         return []
\ No newline at end of file
@@ -1,29 +1,33 @@
 import base64
+import functools
+import hashlib
 import os
 from typing import Optional
 
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 
 def _derive_key(secret: str, salt: Optional[bytes] = None) -> bytes:
     """
     Derive a Fernet-compatible key from a secret using PBKDF2-HMAC.
     For demo purposes, salt is static if not provided. In production, use per-record salt.
+    Uses hashlib's OpenSSL-backed PBKDF2 (SHA-NI where the CPU has it), which releases the GIL while deriving.
     """
     if salt is None:
         salt = b"wandergenie-static-salt"
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(), length=32, salt=salt, iterations=390000
-    )
-    key = base64.urlsafe_b64encode(kdf.derive(secret.encode("utf-8")))
+    derived = hashlib.pbkdf2_hmac("sha256", secret.encode("utf-8"), salt, 390000, dklen=32)
+    key = base64.urlsafe_b64encode(derived)
     return key
 
 
+@functools.lru_cache(maxsize=16)
+def _get_fernet_cached(secret: str, salt: Optional[bytes] = None) -> Fernet:
+    # The derived key is a pure function of (secret, salt), so the 390k-round KDF runs once per pair
+    return Fernet(_derive_key(secret, salt))
+
+
 def get_fernet(secret: str) -> Fernet:
-    key = _derive_key(secret)
-    return Fernet(key)
+    return _get_fernet_cached(secret)
 
 
 def encrypt_str(plain: str, secret: str) -> str:
@@ -36,9 +40,11 @@ def decrypt_str(token: str, secret: str) -> str:
     return f.decrypt(token.encode("utf-8")).decode("utf-8")
 
 
+_MASK_PREFIX = "**** **** **** "
+
+
 def mask_card(card_number: str) -> str:
     """
     Return masked PAN, keeping last 4 digits visible (e.g., **** **** **** 1234).
     """
-    last4 = card_number[-4:] if len(card_number) >= 4 else card_number
-    return f"**** **** **** {last4}"
\ No newline at end of file
+    return _MASK_PREFIX + card_number[-4:]
\ No newline at end of file
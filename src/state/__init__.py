@@ -0,0 +1 @@
+"""Shared application state (consents, tokens, holds, idempotency keys)."""
\ No newline at end of file
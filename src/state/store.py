@@ -0,0 +1,170 @@
+import os
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import orjson
+from cachetools import TTLCache
+from loguru import logger
+from redis.asyncio import Redis
+
+from src.payment.vault import StoredPaymentToken
+from src.permissions.consent import UserConsent
+from src.security.crypto import decrypt_str, encrypt_str
+
+IDEMPOTENCY_TTL_S = 3600
+# Holds outlive their idempotency keys so a replayed key always resolves to a live reservation
+HOLD_TTL_S = 24 * 3600
+# OAuth tokens expire with the access token; this applies when the provider omits expires_in
+OAUTH_TOKEN_DEFAULT_TTL_S = 3600
+# Placeholder stored under a capture idempotency key while the claiming request is still charging
+CAPTURE_PENDING = "pending"
+# Hot consent/payment-token reads are served from process memory for this long before re-reading Redis
+LOCAL_CACHE_TTL_S = 30
+LOCAL_CACHE_MAXSIZE = 10_000
+
+
+class MemoryBackend:
+    """
+    Process-local stand-in for Redis exposing the subset of commands StateStore uses.
+    State is not shared between workers; use it for development and tests only.
+    """
+
+    def __init__(self, timer: Callable[[], float] = time.monotonic):
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._timer = timer
+
+    async def get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= self._timer():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and await self.get(key) is not None:
+            return None
+        self._data[key] = (value, self._timer() + ex if ex else None)
+        return True
+
+    async def delete(self, key: str) -> int:
+        return 1 if self._data.pop(key, None) is not None else 0
+
+    async def aclose(self) -> None:
+        self._data.clear()
+
+
+class StateStore:
+    """
+    Async façade over the state shared by all API workers.
+    Values are stored as JSON strings under namespaced keys so any worker can read them back.
+    Consents and payment tokens are also cached in-process; writes invalidate the local entry,
+    other workers may serve the previous value for up to LOCAL_CACHE_TTL_S.
+    OAuth tokens are encrypted with the vault secret before they leave the process.
+    """
+
+    def __init__(self, backend: Any, secret: str):
+        self._kv = backend
+        self._secret = secret
+        self._consents: TTLCache = TTLCache(maxsize=LOCAL_CACHE_MAXSIZE, ttl=LOCAL_CACHE_TTL_S)
+        self._payment_tokens: TTLCache = TTLCache(maxsize=LOCAL_CACHE_MAXSIZE, ttl=LOCAL_CACHE_TTL_S)
+
+    async def get_consent(self, user_id: str) -> Optional[UserConsent]:
+        consent = self._consents.get(user_id)
+        if consent is None:
+            raw = await self._kv.get(f"consent:{user_id}")
+            if not raw:
+                return None
+            consent = self._consents[user_id] = UserConsent.model_validate_json(raw)
+        return consent
+
+    async def set_consent(self, consent: UserConsent) -> None:
+        await self._kv.set(f"consent:{consent.user_id}", consent.model_dump_json())
+        self._consents.pop(consent.user_id, None)
+
+    async def set_oauth_token(self, user_id: str, token: Dict[str, Any]) -> None:
+        enc = encrypt_str(orjson.dumps(token).decode("utf-8"), self._secret)
+        ttl = int(token.get("expires_in") or OAUTH_TOKEN_DEFAULT_TTL_S)
+        await self._kv.set(f"oauth:{user_id}", enc, ex=ttl)
+
+    async def get_oauth_token(self, user_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self._kv.get(f"oauth:{user_id}")
+        return orjson.loads(decrypt_str(raw, self._secret)) if raw else None
+
+    async def get_payment_token(self, user_id: str) -> Optional[StoredPaymentToken]:
+        stored = self._payment_tokens.get(user_id)
+        if stored is None:
+            raw = await self._kv.get(f"paytoken:{user_id}")
+            if not raw:
+                return None
+            stored = self._payment_tokens[user_id] = StoredPaymentToken(**orjson.loads(raw))
+        return stored
+
+    async def set_payment_token(self, user_id: str, stored: StoredPaymentToken) -> None:
+        await self._kv.set(f"paytoken:{user_id}", orjson.dumps(asdict(stored)).decode("utf-8"))
+        self._payment_tokens.pop(user_id, None)
+
+    async def get_hold(self, reservation_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self._kv.get(f"hold:{reservation_id}")
+        return orjson.loads(raw) if raw else None
+
+    async def set_hold(self, reservation_id: str, record: Dict[str, Any]) -> None:
+        await self._kv.set(f"hold:{reservation_id}", orjson.dumps(record).decode("utf-8"), ex=HOLD_TTL_S)
+
+    async def get_hold_idempotency(self, key: Optional[str]) -> Optional[str]:
+        if not key:
+            return None
+        return await self._kv.get(f"idem:hold:{key}")
+
+    async def claim_hold_idempotency(self, key: Optional[str], reservation_id: str) -> Optional[str]:
+        """
+        Atomically bind key to reservation_id (SET NX EX). Returns None when the claim wins
+        (or no key was given), otherwise the reservation id stored by the earlier request.
+        """
+        if not key:
+            return None
+        if await self._kv.set(f"idem:hold:{key}", reservation_id, nx=True, ex=IDEMPOTENCY_TTL_S):
+            return None
+        return await self._kv.get(f"idem:hold:{key}")
+
+    async def claim_capture_idempotency(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Atomically mark key as in-flight (SET NX EX). Returns None when the claim wins (or no key
+        was given), otherwise the stored capture result, or {"status": CAPTURE_PENDING} while the
+        claiming request is still running.
+        """
+        if not key:
+            return None
+        pending = orjson.dumps({"status": CAPTURE_PENDING}).decode("utf-8")
+        if await self._kv.set(f"idem:capture:{key}", pending, nx=True, ex=IDEMPOTENCY_TTL_S):
+            return None
+        raw = await self._kv.get(f"idem:capture:{key}")
+        return orjson.loads(raw) if raw else None
+
+    async def release_capture_idempotency(self, key: Optional[str]) -> None:
+        """Drop an in-flight claim after a failed capture so the client can retry with the same key."""
+        if key:
+            await self._kv.delete(f"idem:capture:{key}")
+
+    async def set_capture_idempotency(self, key: str, result: Dict[str, Any]) -> None:
+        await self._kv.set(f"idem:capture:{key}", orjson.dumps(result).decode("utf-8"), ex=IDEMPOTENCY_TTL_S)
+
+    async def close(self) -> None:
+        await self._kv.aclose()
+
+
+def get_state_store() -> StateStore:
+    """
+    Build the state store from REDIS_URL; without it, fall back to process-local memory.
+    """
+    secret = os.getenv("ENCRYPTION_SECRET")
+    if not secret:
+        raise RuntimeError("ENCRYPTION_SECRET is not set. Configure .env before using the state store.")
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return StateStore(Redis.from_url(redis_url, decode_responses=True), secret)
+    logger.bind(event="state_memory_backend").warning("REDIS_URL not set; using process-local state (single worker only)")
+    return StateStore(MemoryBackend(), secret)
\ No newline at end of file
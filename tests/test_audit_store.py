@@ -0,0 +1,142 @@
+import asyncio
+import sqlite3
+
+from src import database
+from src.audit import store
+
+# auditevent as created before created_at had a server default
+LEGACY_AUDIT_SCHEMA = """
+CREATE TABLE auditevent (
+    id INTEGER NOT NULL,
+    created_at DATETIME NOT NULL,
+    actor VARCHAR NOT NULL,
+    action VARCHAR NOT NULL,
+    status VARCHAR NOT NULL,
+    reservation_id VARCHAR,
+    amount_minor INTEGER,
+    currency VARCHAR,
+    vendor VARCHAR,
+    reasons VARCHAR,
+    details VARCHAR,
+    PRIMARY KEY (id)
+)
+"""
+
+
+def _use_database(monkeypatch, path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+    monkeypatch.setattr(database, "_ENGINE", None)
+    monkeypatch.setattr(database, "_SESSIONMAKER", None)
+
+
+def test_record_event_on_legacy_table_without_server_default(monkeypatch, tmp_path):
+    db_path = tmp_path / "legacy.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(LEGACY_AUDIT_SCHEMA)
+    _use_database(monkeypatch, db_path)
+
+    async def scenario():
+        await store.create_tables()
+        evt = await store.record_event("u1", "HELD", "ok", reservation_id="res_1")
+        events = await store.list_events(actor="u1")
+        await database.get_engine().dispose()
+        return evt, events
+
+    evt, events = asyncio.run(scenario())
+
+    assert evt.created_at is not None
+    assert [e.reservation_id for e in events] == ["res_1"]
+
+
+def test_create_tables_adds_recent_index_to_existing_table(monkeypatch, tmp_path):
+    db_path = tmp_path / "legacy.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(LEGACY_AUDIT_SCHEMA)
+        conn.execute("CREATE INDEX ix_audit_recent ON auditevent (created_at, actor, action)")
+    _use_database(monkeypatch, db_path)
+
+    async def scenario():
+        await store.create_tables()
+        # Running again must not try to recreate the index
+        await store.create_tables()
+        await database.get_engine().dispose()
+
+    asyncio.run(scenario())
+
+    with sqlite3.connect(db_path) as conn:
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "ix_audit_actor_recent" in indexes
+    assert "ix_audit_recent" not in indexes
+
+
+def test_recent_event_listings_are_served_in_index_order(monkeypatch, tmp_path):
+    db_path = tmp_path / "audit.db"
+    _use_database(monkeypatch, db_path)
+
+    async def scenario():
+        await store.create_tables()
+        await database.get_engine().dispose()
+
+    asyncio.run(scenario())
+
+    actions = ["PROPOSED", "HELD", "APPROVED", "CAPTURED", "DENIED"]
+    rows = [
+        (f"2026-01-01 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}", f"u{i % 200}", actions[i % 5], "ok")
+        for i in range(20000)
+    ]
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO auditevent (created_at, actor, action, status) VALUES (?, ?, ?, ?)", rows)
+        conn.execute("ANALYZE")
+        # Same shape list_events emits for each filter combination
+        for where, args in [("", ()), ("WHERE actor = ?", ("u1",)), ("WHERE action = ?", ("HELD",)),
+                            ("WHERE actor = ? AND action = ?", ("u1", "HELD"))]:
+            sql = f"SELECT * FROM auditevent {where} ORDER BY created_at DESC, id DESC LIMIT 50"
+            plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, args))
+            assert "TEMP B-TREE" not in plan, (where, plan)
+
+
+def test_audit_writer_batches_and_flushes_on_stop(monkeypatch, tmp_path):
+    _use_database(monkeypatch, tmp_path / "audit.db")
+    batch_sizes = []
+    write_batch = store._write_batch
+
+    async def recording_write_batch(queue, batch):
+        batch_sizes.append(len(batch))
+        await write_batch(queue, batch)
+
+    monkeypatch.setattr(store, "_write_batch", recording_write_batch)
+
+    async def scenario():
+        await store.create_tables()
+        store.start_audit_writer()
+        for i in range(5):
+            store.enqueue_event("u1", "HELD", "ok", reservation_id=f"res_{i}")
+        await store.stop_audit_writer()
+        events = await store.list_events(actor="u1")
+        await database.get_engine().dispose()
+        return events
+
+    events = asyncio.run(scenario())
+
+    assert batch_sizes == [5]
+    assert sorted(e.reservation_id for e in events) == [f"res_{i}" for i in range(5)]
+    assert store._AUDIT_QUEUE is None and store._AUDIT_WRITER is None
+
+
+def test_audit_writer_failed_batch_does_not_block_shutdown(monkeypatch, tmp_path):
+    _use_database(monkeypatch, tmp_path / "audit.db")
+
+    def broken_sessionmaker():
+        raise RuntimeError("database unavailable")
+
+    async def scenario():
+        store.start_audit_writer()
+        monkeypatch.setattr(store, "get_sessionmaker", broken_sessionmaker)
+        store.enqueue_event("u1", "HELD", "ok")
+        store.enqueue_event("u1", "APPROVED", "ok")
+        # join() only returns if the failed batch still marked its items done
+        await asyncio.wait_for(store.stop_audit_writer(), timeout=2)
+
+    asyncio.run(scenario())
+
+    assert store._AUDIT_QUEUE is None and store._AUDIT_WRITER is None
\ No newline at end of file
@@ -1,3 +1,30 @@
+import asyncio
+
+from src.booking import automation
+
+
 def test_booking_automation_skeleton():
     # Placeholder test for booking automation sequence
-    assert True
\ No newline at end of file
+    assert True
+
+
+def test_process_reservations_books_items_concurrently(monkeypatch):
+    async def slow_book(item):
+        if item.get("fail"):
+            raise RuntimeError("provider unavailable")
+        await asyncio.sleep(0.05)
+        return {"status": "reserved", "item": item}
+
+    monkeypatch.setattr(automation, "_book_one", slow_book)
+    itinerary = [{"type": "flight"}, {"type": "hotel"}, {"type": "activity", "fail": True}]
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await automation.process_reservations(itinerary, authorized=True)
+        return results, loop.time() - start
+
+    results, elapsed = asyncio.run(scenario())
+    assert [r["status"] for r in results] == ["reserved", "reserved", "error"]
+    assert results[2]["reason"] == "provider unavailable"
+    assert elapsed < 0.1
\ No newline at end of file
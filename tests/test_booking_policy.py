@@ -0,0 +1,24 @@
+from src.booking.policy import BookingPolicy, check_policy
+
+
+def test_compiled_policy_accepts_matching_request():
+    policy = BookingPolicy(max_budget_minor=20000, currency="usd", allowed_vendors=["V1"])
+    assert policy.compile()(15000, "USD", "V1") is None
+    assert check_policy(15000, "USD", "V1", policy) == {"ok": True, "reasons": []}
+
+
+def test_compiled_policy_reports_every_violation():
+    policy = BookingPolicy(max_budget_minor=20000, currency="USD", allowed_vendors=["V1"])
+    res = check_policy(30000, "EUR", "V2", policy)
+    assert res["ok"] is False
+    assert res["reasons"] == [
+        "amount 30000 exceeds cap 20000",
+        "currency EUR not allowed; expected USD",
+        "vendor V2 not in allowed list",
+    ]
+
+
+def test_policies_with_the_same_shape_share_a_validator():
+    a = BookingPolicy(max_budget_minor=100, allowed_vendors=["A", "B"])
+    b = BookingPolicy(max_budget_minor=100, allowed_vendors=["B", "A"])
+    assert a.compile() is b.compile()
\ No newline at end of file
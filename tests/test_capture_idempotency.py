@@ -0,0 +1,72 @@
+from fastapi.testclient import TestClient
+
+import app as appmod
+from src import database
+
+POLICY = {"max_budget_minor": 20000, "currency": "USD", "allowed_vendors": ["V"]}
+
+
+def _approved_hold(client):
+    client.post("/api/consent", json={"user_id": "u1", "scopes": {"payment_processing": True}})
+    client.post("/api/payment/store-token", json={"user_id": "u1", "gateway_token": "tok", "last4": "4242"})
+    hold = client.post("/api/autonomous/hold", json={
+        "user_id": "u1", "amount_minor": 100, "currency": "USD", "vendor": "V", "policy": POLICY,
+    })
+    reservation_id = hold.json()["reservation_id"]
+    client.post("/api/autonomous/approve", json={"reservation_id": reservation_id})
+    return reservation_id
+
+
+def test_capture_key_is_kept_when_failure_follows_the_charge(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setenv("ENCRYPTION_SECRET", "test-secret")
+    monkeypatch.setattr(database, "_ENGINE", None)
+    monkeypatch.setattr(database, "_SESSIONMAKER", None)
+
+    with TestClient(appmod.app, raise_server_exceptions=False) as client:
+        reservation_id = _approved_hold(client)
+
+        captures = []
+        capture = appmod.payment_processor.capture
+
+        async def counting_capture(authorization_id):
+            captures.append(authorization_id)
+            return await capture(authorization_id)
+
+        set_hold = appmod.STATE.set_hold
+
+        async def failing_set_hold(rid, record):
+            if record.get("status") == "CONFIRMED":
+                raise RuntimeError("state store unavailable")
+            await set_hold(rid, record)
+
+        monkeypatch.setattr(appmod.payment_processor, "capture", counting_capture)
+        monkeypatch.setattr(appmod.STATE, "set_hold", failing_set_hold)
+
+        body = {"user_id": "u1", "reservation_id": reservation_id, "idempotency_key": "cap-1"}
+        first = client.post("/api/autonomous/capture", json=body)
+        retry = client.post("/api/autonomous/capture", json=body)
+
+    assert first.status_code == 500
+    assert retry.status_code == 200
+    assert retry.json()["idempotent"] is True
+    assert len(captures) == 1
+
+
+def test_capture_key_is_released_when_nothing_was_charged(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setenv("ENCRYPTION_SECRET", "test-secret")
+    monkeypatch.setattr(database, "_ENGINE", None)
+    monkeypatch.setattr(database, "_SESSIONMAKER", None)
+
+    with TestClient(appmod.app) as client:
+        body = {"user_id": "u1", "reservation_id": "res_missing", "idempotency_key": "cap-2"}
+        client.post("/api/consent", json={"user_id": "u1", "scopes": {"payment_processing": True}})
+        missing = client.post("/api/autonomous/capture", json=body)
+
+        body["reservation_id"] = _approved_hold(client)
+        captured = client.post("/api/autonomous/capture", json=body)
+
+    assert missing.status_code == 404
+    assert captured.status_code == 200
+    assert captured.json()["idempotent"] is True and captured.json()["status"] == "CONFIRMED"
\ No newline at end of file
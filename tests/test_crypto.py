@@ -0,0 +1,13 @@
+from src.security.crypto import decrypt_str, encrypt_str, get_fernet, mask_card
+
+
+def test_encrypt_round_trip_reuses_derived_key():
+    token = encrypt_str("tok_123", "secret")
+    assert token != "tok_123"
+    assert decrypt_str(token, "secret") == "tok_123"
+    assert get_fernet("secret") is get_fernet("secret")
+
+
+def test_mask_card_keeps_last_four_digits():
+    assert mask_card("4242424242424242") == "**** **** **** 4242"
+    assert mask_card("42") == "**** **** **** 42"
\ No newline at end of file
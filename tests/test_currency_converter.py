@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src import currency_converter as cc
+
+COUNTRY_PAYLOAD = [{"name": {"common": "Indonesia"}, "currencies": {"IDR": {"name": "Indonesian rupiah"}}}]
+
+
+def _mock_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_country_and_rates_are_fetched_concurrently():
+    cc._RATES_CACHE.clear()
+
+    async def scenario():
+        arrived = []
+        both_in_flight = asyncio.Event()
+
+        async def handler(request):
+            arrived.append(request.url.host)
+            if len(arrived) == 2:
+                both_in_flight.set()
+            # Neither response is sent until both requests are open, so a sequential caller would time out
+            await asyncio.wait_for(both_in_flight.wait(), timeout=1)
+            if request.url.host == "restcountries.com":
+                return httpx.Response(200, json=COUNTRY_PAYLOAD)
+            assert "symbols" not in request.url.params
+            return httpx.Response(200, json={"rates": {"IDR": 16000.0, "EUR": 0.9}})
+
+        return await cc.fetch_country_currency_and_rates("Indonesia", "USD", transport=httpx.MockTransport(handler))
+
+    (code, name), rates = asyncio.run(scenario())
+
+    assert (code, name) == ("IDR", "Indonesian rupiah")
+    assert rates == {"IDR": 16000.0, "EUR": 0.9}
+    cc.ensure_symbols(rates, [code, "EUR"])
+
+
+def test_country_rates_missing_the_resolved_currency_fail_ensure_symbols():
+    cc._RATES_CACHE.clear()
+
+    def handler(request):
+        if request.url.host == "restcountries.com":
+            return httpx.Response(200, json=COUNTRY_PAYLOAD)
+        return httpx.Response(200, json={"rates": {"EUR": 0.9}})
+
+    (code, _), rates = asyncio.run(
+        cc.fetch_country_currency_and_rates("Indonesia", "USD", transport=httpx.MockTransport(handler))
+    )
+
+    with pytest.raises(ValueError, match="IDR"):
+        cc.ensure_symbols(rates, [code, "EUR"])
+
+
+def test_rates_cache_key_ignores_symbol_order():
+    assert cc._rates_cache_key("USD", ["GBP", "EUR"]) == cc._rates_cache_key("USD", ["EUR", "GBP"])
+    assert cc._rates_cache_key("USD", None) != cc._rates_cache_key("EUR", None)
+
+
+def test_cached_rates_are_shared_across_symbol_order_and_returned_as_copies():
+    cc._RATES_CACHE.clear()
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"rates": {"EUR": 0.9, "GBP": 0.8}})
+
+    async def scenario():
+        client = _mock_client(handler)
+        first = await cc.fetch_exchange_rates_async(client, "USD", ["EUR", "GBP"])
+        first["EUR"] = 0.0
+        second = await cc.fetch_exchange_rates_async(client, "USD", ["GBP", "EUR"])
+        await client.aclose()
+        return second
+
+    second = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert second == {"EUR": 0.9, "GBP": 0.8}
+
+
+def test_convert_amounts_accepts_string_rates():
+    conversions = cc.convert_amounts(200.0, {"EUR": "0.5", "JPY": 150}, ["EUR", "JPY"])
+
+    assert conversions == [("EUR", 0.5, 100.0), ("JPY", 150.0, 30000.0)]
+    assert all(isinstance(rate, float) and isinstance(converted, float) for _, rate, converted in conversions)
\ No newline at end of file
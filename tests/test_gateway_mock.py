@@ -0,0 +1,26 @@
+import asyncio
+import time
+
+from src.payment.gateway_mock import MockGatewayClient
+
+
+def test_mock_gateway_has_no_latency_by_default():
+    gateway = MockGatewayClient()
+
+    async def flow():
+        auth = await gateway.authorize(1000, "USD", None, {})
+        cap = await gateway.capture(auth["authorization_id"])
+        return await gateway.refund(cap["payment_id"], 1000)
+
+    start = time.perf_counter()
+    refund = asyncio.run(flow())
+    assert refund["status"] == "refunded"
+    assert time.perf_counter() - start < 0.05
+
+
+def test_mock_gateway_latency_is_opt_in():
+    gateway = MockGatewayClient(latency_s=0.02)
+
+    start = time.perf_counter()
+    asyncio.run(gateway.capture("auth_1"))
+    assert time.perf_counter() - start >= 0.02
\ No newline at end of file
@@ -0,0 +1,147 @@
+import asyncio
+from types import SimpleNamespace
+
+from cachetools import TTLCache
+
+from src import main
+
+
+class _FakeStream:
+    def __init__(self, pieces):
+        self._pieces = list(pieces)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._pieces:
+            raise StopAsyncIteration
+        piece = self._pieces.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+class _FakeCompletions:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if not kwargs["stream"]:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="".join(self.pieces)))])
+        return _FakeStream(self.pieces)
+
+
+def _fake_client(pieces):
+    completions = _FakeCompletions(pieces)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions)), completions
+
+
+async def _no_attractions(destination, limit=6):
+    return []
+
+
+async def _collect(agen):
+    return [piece async for piece in agen]
+
+
+def test_stream_vacation_plan_yields_model_chunks(monkeypatch):
+    client, completions = _fake_client(["<table>", None, "<tr></tr>", "</table>"])
+    monkeypatch.setattr(main, "_get_client", lambda: client)
+    monkeypatch.setattr(main, "fetch_attractions", _no_attractions)
+
+    pieces = asyncio.run(_collect(main.stream_vacation_plan({"destination": "Kyoto"})))
+
+    assert pieces == ["<table>", "<tr></tr>", "</table>"]
+    assert completions.calls[0]["stream"] is True
+
+
+def test_stream_vacation_plan_falls_back_on_error(monkeypatch):
+    def _missing_key():
+        raise ValueError("GROQ_API_KEY environment variable not set.")
+
+    monkeypatch.setattr(main, "_get_client", _missing_key)
+
+    pieces = asyncio.run(_collect(main.stream_vacation_plan({"destination": "Kyoto"})))
+
+    assert pieces == [main._FALLBACK_PLAN_HTML]
+
+
+def test_system_prompt_is_static_across_destinations(monkeypatch):
+    async def _attractions(destination, limit=6):
+        return [{"name": f"{destination} Castle", "desc": "old"}]
+
+    monkeypatch.setattr(main, "fetch_attractions", _attractions)
+    monkeypatch.setattr(main, "_CONTEXT_CACHE", {})
+
+    kyoto = asyncio.run(main._build_messages({"destination": "Kyoto"}))
+    paris = asyncio.run(main._build_messages({"destination": "Paris"}))
+
+    assert kyoto[0] == paris[0] == {"role": "system", "content": main._SYSTEM_PROMPT}
+    assert kyoto[1]["content"] == "Destination context (public data):\n- Kyoto Castle: old"
+    assert paris[1]["content"] != kyoto[1]["content"]
+
+
+def test_context_for_memoizes_non_empty_destinations(monkeypatch):
+    calls = []
+
+    async def _attractions(destination, limit=6):
+        calls.append(destination)
+        return [{"name": "Fushimi Inari", "desc": "shrine"}] if destination.strip() == "Kyoto" else []
+
+    monkeypatch.setattr(main, "fetch_attractions", _attractions)
+    monkeypatch.setattr(main, "_CONTEXT_CACHE", {})
+
+    async def run():
+        first = await main._context_for("Kyoto")
+        second = await main._context_for(" kyoto ")
+        empty = await main._context_for("")
+        missing = await main._context_for("Nowhere")
+        await main._context_for("Nowhere")
+        return first, second, empty, missing
+
+    first, second, empty, missing = asyncio.run(run())
+
+    assert first == second == "- Fushimi Inari: shrine"
+    assert empty == missing == "- No external context found"
+    assert calls == ["Kyoto", "Nowhere", "Nowhere"]
+
+
+def test_context_for_entries_expire(monkeypatch):
+    calls = []
+    now = [0.0]
+
+    async def _attractions(destination, limit=6):
+        calls.append(destination)
+        return [{"name": "Fushimi Inari", "desc": "shrine"}]
+
+    assert main._CONTEXT_CACHE.ttl <= main.ATTRACTIONS_CACHE_TTL_S
+    monkeypatch.setattr(main, "fetch_attractions", _attractions)
+    monkeypatch.setattr(main, "_CONTEXT_CACHE", TTLCache(maxsize=8, ttl=main._CONTEXT_CACHE.ttl, timer=lambda: now[0]))
+
+    asyncio.run(main._context_for("Kyoto"))
+    asyncio.run(main._context_for("Kyoto"))
+    now[0] += main.ATTRACTIONS_CACHE_TTL_S + 1
+    asyncio.run(main._context_for("Kyoto"))
+
+    assert calls == ["Kyoto", "Kyoto"]
+
+
+def test_slow_stream_reader_does_not_hold_a_groq_permit(monkeypatch):
+    client, _ = _fake_client(["<table>", "</table>"])
+    monkeypatch.setattr(main, "_get_client", lambda: client)
+    monkeypatch.setattr(main, "fetch_attractions", _no_attractions)
+
+    async def scenario():
+        monkeypatch.setattr(main, "_GROQ_SEM", asyncio.Semaphore(1))
+        stream = main.stream_vacation_plan({"destination": "Kyoto"})
+        # The reader has taken one chunk and stalls; the buffered endpoint must still get through
+        first = await stream.__anext__()
+        plan = await asyncio.wait_for(main.generate_vacation_plan({"destination": "Kyoto"}), timeout=1)
+        await stream.aclose()
+        return first, plan
+
+    first, plan = asyncio.run(scenario())
+
+    assert first == "<table>"
+    assert plan == "<table></table>"
\ No newline at end of file
@@ -0,0 +1,97 @@
+import asyncio
+
+from src.payment.vault import StoredPaymentToken
+from src.permissions.consent import ConsentScopes, UserConsent
+from src.state import store
+from src.state.store import MemoryBackend, StateStore
+
+SECRET = "test-secret"
+
+
+def test_state_store_round_trips_values():
+    async def scenario():
+        state = StateStore(MemoryBackend(), SECRET)
+        await state.set_consent(UserConsent(user_id="u1", scopes=ConsentScopes(payment_processing=True)))
+        await state.set_payment_token("u1", StoredPaymentToken(token="enc", masked_pan="**** **** **** 4242"))
+        await state.set_hold("res_1", {"status": "HELD", "amount_minor": 100})
+
+        consent = await state.get_consent("u1")
+        assert consent is not None and consent.scopes.payment_processing
+        assert (await state.get_payment_token("u1")).masked_pan == "**** **** **** 4242"
+        assert (await state.get_hold("res_1"))["status"] == "HELD"
+        assert await state.get_consent("missing") is None
+
+    asyncio.run(scenario())
+
+
+def test_state_store_invalidates_cached_consent_on_write():
+    async def scenario():
+        state = StateStore(MemoryBackend(), SECRET)
+        await state.set_consent(UserConsent(user_id="u1", scopes=ConsentScopes(payment_processing=False)))
+        assert not (await state.get_consent("u1")).scopes.payment_processing
+        await state.set_consent(UserConsent(user_id="u1", scopes=ConsentScopes(payment_processing=True)))
+        assert (await state.get_consent("u1")).scopes.payment_processing
+
+    asyncio.run(scenario())
+
+
+def test_memory_backend_expires_keys():
+    now = [100.0]
+
+    async def scenario():
+        kv = MemoryBackend(timer=lambda: now[0])
+        await kv.set("k", "v", ex=1)
+        assert await kv.get("k") == "v"
+        now[0] = 101.0
+        assert await kv.get("k") is None
+
+    asyncio.run(scenario())
+
+
+def test_idempotency_claims_are_first_writer_wins():
+    async def scenario():
+        state = StateStore(MemoryBackend(), SECRET)
+        assert await state.claim_hold_idempotency("k", "res_a") is None
+        assert await state.claim_hold_idempotency("k", "res_b") == "res_a"
+        assert await state.claim_hold_idempotency(None, "res_c") is None
+
+        assert await state.claim_capture_idempotency("c") is None
+        assert (await state.claim_capture_idempotency("c"))["status"] == store.CAPTURE_PENDING
+        await state.release_capture_idempotency("c")
+        assert await state.claim_capture_idempotency("c") is None
+        await state.set_capture_idempotency("c", {"status": "captured", "payment_id": "pay_1"})
+        assert (await state.claim_capture_idempotency("c"))["payment_id"] == "pay_1"
+
+    asyncio.run(scenario())
+
+
+def test_oauth_tokens_are_encrypted_and_expire_with_the_access_token():
+    now = [0.0]
+
+    async def scenario():
+        kv = MemoryBackend(timer=lambda: now[0])
+        state = StateStore(kv, SECRET)
+        token = {"access_token": "at-123", "refresh_token": "rt-456", "expires_in": 120}
+        await state.set_oauth_token("u1", token)
+
+        raw = await kv.get("oauth:u1")
+        assert "at-123" not in raw and "rt-456" not in raw
+        assert await state.get_oauth_token("u1") == token
+        now[0] = 121.0
+        assert await state.get_oauth_token("u1") is None
+
+    asyncio.run(scenario())
+
+
+def test_holds_expire():
+    now = [0.0]
+
+    async def scenario():
+        state = StateStore(MemoryBackend(timer=lambda: now[0]), SECRET)
+        await state.set_hold("res_1", {"status": "HELD"})
+        now[0] = store.HOLD_TTL_S - 1
+        assert (await state.get_hold("res_1"))["status"] == "HELD"
+        now[0] = store.HOLD_TTL_S
+        assert await state.get_hold("res_1") is None
+
+    asyncio.run(scenario())
\ No newline at end of file
@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+
+from src.providers import wikipedia
+
+SEARCH_PAYLOAD = {
+    "query": {
+        "search": [
+            {"title": "Kinkaku-ji", "snippet": 'Zen <span class="searchmatch">temple</span> in Kyoto'},
+            {"title": "", "snippet": "untitled"},
+        ]
+    }
+}
+
+
+def _mock_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_fetch_attractions_parses_and_caches_results(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json=SEARCH_PAYLOAD)
+
+    monkeypatch.setattr(wikipedia, "_HTTP", _mock_client(handler))
+    wikipedia._ATTRACTIONS_CACHE.clear()
+
+    first = asyncio.run(wikipedia.fetch_attractions("Kyoto"))
+    second = asyncio.run(wikipedia.fetch_attractions("  kyoto "))
+
+    assert first == [{"name": "Kinkaku-ji", "desc": "Zen temple in Kyoto"}]
+    assert second == first
+    assert len(calls) == 1
+    assert calls[0].url.params["srprop"] == "snippet"
+
+
+def test_fetch_attractions_does_not_cache_failures(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    monkeypatch.setattr(wikipedia, "_HTTP", _mock_client(handler))
+    wikipedia._ATTRACTIONS_CACHE.clear()
+
+    assert asyncio.run(wikipedia.fetch_attractions("Lisbon")) == []
+    assert asyncio.run(wikipedia.fetch_attractions("Lisbon")) == []
+    assert len(calls) == 2
+
+
+def test_fetch_attractions_revalidates_with_etag(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=SEARCH_PAYLOAD, headers={"ETag": '"v1"'})
+
+    monkeypatch.setattr(wikipedia, "_HTTP", _mock_client(handler))
+    wikipedia._ATTRACTIONS_CACHE.clear()
+    wikipedia._ETAGS.clear()
+
+    first = asyncio.run(wikipedia.fetch_attractions("Kyoto"))
+    # Simulate the TTL entry expiring; the ETag validator survives
+    wikipedia._ATTRACTIONS_CACHE.clear()
+    second = asyncio.run(wikipedia.fetch_attractions("Kyoto"))
+
+    assert second == first == [{"name": "Kinkaku-ji", "desc": "Zen temple in Kyoto"}]
+    assert "If-None-Match" not in calls[0].headers
+    assert calls[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_close_http_client_closes_shared_client(monkeypatch):
+    client = _mock_client(lambda request: httpx.Response(200, json=SEARCH_PAYLOAD))
+    monkeypatch.setattr(wikipedia, "_HTTP", client)
+
+    asyncio.run(wikipedia.close_http_client())
+
+    assert client.is_closed
+    # A later lookup (e.g. after an in-process app restart) gets a fresh client
+    fresh = wikipedia._get_http()
+    assert fresh is not client and not fresh.is_closed
+    asyncio.run(wikipedia.close_http_client())
\ No newline at end of file